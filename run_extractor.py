@@ -1,11 +1,13 @@
-from youtube_extractor import process_youtube_video
+from youtube_extractor import COMPRESS_TRANSCRIPTS, process_youtube_video, write_text_atomic
+import asyncio
 import json
-import os
+import logging
+from pathlib import Path
 
 def main():
     # 配置输出目录
-    output_dir = "output"
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = Path("output")
+    output_dir.mkdir(parents=True, exist_ok=True)
     
     # 获取用户输入
     print("=== YouTube内容提取与分析工具 ===")
@@ -18,21 +20,20 @@ def main():
     
     print("\n开始处理视频...\n")
     
-    # 处理视频
-    result = process_youtube_video(video_url, analysis_prompt)
+    # 处理视频（分析结果在生成过程中实时输出）
+    result = asyncio.run(process_youtube_video(video_url, analysis_prompt))
     
     # 保存结果
     video_id = result["video_id"]
     
     # 保存字幕
-    transcript_path = os.path.join(output_dir, f"{video_id}_transcript.txt")
-    with open(transcript_path, "w", encoding="utf-8") as f:
-        f.write(result["transcript"])
+    # 字幕可能很长，COMPRESS_TRANSCRIPTS为True时压缩保存
+    transcript_path = write_text_atomic(output_dir / f"{video_id}_transcript.txt", result["transcript"],
+                                        compress=COMPRESS_TRANSCRIPTS)
     
     # 保存分析结果
-    analysis_path = os.path.join(output_dir, f"{video_id}_analysis.txt")
-    with open(analysis_path, "w", encoding="utf-8") as f:
-        f.write(result["analysis"])
+    analysis_path = output_dir / f"{video_id}_analysis.txt"
+    write_text_atomic(analysis_path, result["analysis"])
     
     # 显示结果
     print("\n=== 处理完成 ===")
@@ -40,15 +41,14 @@ def main():
     print(f"可用字幕语言: {result['available_languages']}")
     print(f"字幕已保存至: {transcript_path}")
     print(f"分析结果已保存至: {analysis_path}")
-    print("\n分析结果预览:")
-    print("-" * 50)
-    print(result["analysis"])
-    print("-" * 50)
     
     print("\n按回车键退出...")
     input()
 
 if __name__ == "__main__":
+    # 交互模式下显示处理进度（只放开本项目的INFO日志，第三方库仍只输出警告和错误）
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("youtube_extractor").setLevel(logging.INFO)
     try:
         main()
     except Exception as e:
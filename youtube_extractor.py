@@ -1,27 +1,380 @@
+import asyncio
+import functools
+import hashlib
+import multiprocessing
 import os
 import re
-import tempfile
-from typing import Optional, Dict, Any, Tuple
+import shutil
+import signal
+import sqlite3
 import subprocess
+import tempfile
+import textwrap
+import threading
+import time
+from typing import Optional, Callable, Dict, Any, List, Tuple
+import sys
 import json
+import logging
+from pathlib import Path
 import requests
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled
+from requests.adapters import HTTPAdapter
+from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，只在COMPRESS_TRANSCRIPTS为True时需要
+    zstandard = None
+
+logger = logging.getLogger("youtube_extractor")
+
+_VIDEO_ID_PATTERNS = [
+    re.compile(r'(?:v=|/)([0-9A-Za-z_-]{11})'),
+    re.compile(r'youtu\.be/([0-9A-Za-z_-]{11})'),
+]
+
+# 英文音频使用蒸馏模型（解码层更少、速度快数倍）；distil-large-v3只支持英文，其他语言仍用多语言模型
+WHISPER_ENGLISH_MODEL = "distil-large-v3"
+WHISPER_MULTILINGUAL_MODEL = "medium"
+
+@functools.lru_cache(maxsize=2)
+def _get_whisper_model(model_name: str = WHISPER_MULTILINGUAL_MODEL):
+    """加载faster-whisper模型并在进程内缓存，避免每次转录都重新加载"""
+    import ctranslate2
+    from faster_whisper import WhisperModel
+    # 有CUDA设备时放到GPU上运行（可通过WHISPER_DEVICE环境变量强制指定cpu/cuda）
+    device = os.environ.get("WHISPER_DEVICE")
+    if device is None:
+        device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    # GPU上使用float16，CPU上使用int8量化
+    compute_type = "float16" if device == "cuda" else "int8"
+    return WhisperModel(model_name, device=device, compute_type=compute_type)
+
+async def _run_in_thread(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """在默认线程池中执行阻塞函数（兼容Python 3.8，不使用asyncio.to_thread）"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+def _kill_process_tree(pid: int) -> None:
+    """终止进程及其启动的所有子进程"""
+    try:
+        if os.name == "posix":
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except ProcessLookupError:
+        pass
+
+def _yt_dlp_download(video_url: str, outtmpl: str) -> Tuple[str, Optional[str]]:
+    """使用yt-dlp下载原始音频流，返回(音频文件路径, 视频语言)"""
+    from yt_dlp import YoutubeDL
+
+    # Whisper自带音频解码，无需用ffmpeg转换为mp3
+    ydl_opts = {
+        "format": "bestaudio[ext=m4a]/bestaudio",
+        "outtmpl": outtmpl,
+        "quiet": True,
+        "noprogress": True,
+        # DASH等分片流时并发下载多个分片
+        "concurrent_fragment_downloads": 8,
+    }
+    if shutil.which("aria2c"):
+        # 安装了aria2c时使用多连接分段下载，突破单连接限速
+        ydl_opts["external_downloader"] = {"default": "aria2c"}
+        ydl_opts["external_downloader_args"] = {"aria2c": ["-x", "16", "-s", "16", "-k", "1M"]}
+
+    with YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(video_url, download=True)
+        return ydl.prepare_filename(info), info.get("language")
+
+def _yt_dlp_download_worker(video_url: str, outtmpl: str, conn) -> None:
+    """下载子进程的入口，通过管道把结果或错误信息发回父进程"""
+    if os.name == "posix":
+        # 建立独立的进程组，取消时连同yt-dlp启动的aria2c等子进程一起终止
+        os.setsid()
+    try:
+        conn.send(("ok", _yt_dlp_download(video_url, outtmpl)))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+def _check_downloaded(audio_path: str) -> str:
+    if not os.path.exists(audio_path):
+        raise FileNotFoundError(f"下载失败，无法找到文件: {audio_path}")
+    return audio_path
+
+CACHE_DIR = os.path.join("output", ".cache")
+
+_NUMBER_PATTERN = re.compile(r'\d+')
+
+LOCAL_LLM_MODEL = "llama3"  # 或其他已下载的ollama模型
+CLAUDE_MODEL = "claude-3-haiku-20240307"  # 使用Haiku模型降低成本
+
+# 超过该长度（字符数）的字幕分段分析后再汇总
+TRANSCRIPT_CHUNK_CHARS = 8000
+MAX_PARALLEL_CHUNKS = 4
+
+# 分析字幕的提示模板，以及综合各段分析结果时使用的提示模板
+TRANSCRIPT_PROMPT_TEMPLATE = "以下是YouTube视频的字幕内容：\n\n{text}\n\n{prompt}"
+REDUCE_PROMPT_TEMPLATE = "以下是一个YouTube视频各部分字幕的分析结果：\n\n{text}\n\n请综合以上各部分的结果回答：{prompt}"
+
+# 直接请求字幕时依次尝试的语言，覆盖绝大多数视频
+PREFERRED_SUBTITLE_LANGUAGES = ['zh-Hans', 'zh-CN', 'zh', 'zh-Hant', 'zh-TW', 'zh-HK', 'en']
+
+# 字幕缓存的有效期（秒）
+VIDEO_CACHE_TTL = 7 * 24 * 3600
+# 是否以zstd压缩保存字幕缓存和字幕文件（文件名追加.zst后缀），开启时需要安装zstandard
+COMPRESS_TRANSCRIPTS = False
+# zstd压缩级别，文本压缩率高且解压耗时可以忽略
+ZSTD_LEVEL = 3
+
+# 分析结果缓存（精确缓存和语义缓存共用）的有效期（秒）和最大条目数
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600
+ANALYSIS_CACHE_MAX_ENTRIES = 1000
+
+class ResponseCache:
+    """基于SQLite的LLM响应缓存，按(模型, 提示, 字幕, 温度)的SHA-256索引，支持过期和LRU淘汰"""
+
+    def __init__(self, path: str = os.path.join(CACHE_DIR, "responses.sqlite3"),
+                 ttl: int = ANALYSIS_CACHE_TTL, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, transcript: str, temperature: Optional[float] = None,
+                 template: str = TRANSCRIPT_PROMPT_TEMPLATE) -> str:
+        """根据请求内容计算缓存键"""
+        payload = json.dumps({
+            "model": model,
+            "prompt": prompt,
+            "transcript": transcript,
+            "temperature": temperature,
+            "template": template
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        # 首次使用时才创建数据库文件
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response BLOB NOT NULL, created_at INTEGER NOT NULL, "
+                "accessed_at REAL NOT NULL, model TEXT)"
+            )
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """返回未过期的缓存响应，没有则返回None"""
+        return self.lookup(key)[0]
+
+    def lookup(self, key: str) -> Tuple[Optional[str], bool]:
+        """返回(未过期的缓存响应, 是否存在但已过期)；过期条目会被删除"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None, False
+            now = time.time()
+            if now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None, True
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return row[0].decode("utf-8"), False
+
+    def set(self, key: str, response: str, model: str) -> None:
+        """写入缓存，并清理过期条目和超出容量的最久未使用条目"""
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at, model) VALUES (?, ?, ?, ?, ?)",
+                (key, response.encode("utf-8"), int(now), now, model)
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            conn.commit()
+
+class SemanticCache:
+    """语义缓存：提示语义相近（余弦距离小于阈值）且字幕相同时复用已有分析结果
+
+    过期时间和容量上限与ResponseCache一致。依赖可选的sentence-transformers和chromadb，未安装时自动禁用。
+
+    注意：嵌入模型对只差一个数字的提示（如"列出7件事"和"列出5件事"）给出的距离往往低于阈值，
+    因此额外要求两条提示中的阿拉伯数字完全相同；中文数字（"七件事"）等其他细微差别仍可能误命中。
+    """
+
+    def __init__(self, path: str = os.path.join(CACHE_DIR, "semantic"),
+                 embedding_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                 max_distance: float = 0.05, ttl: int = ANALYSIS_CACHE_TTL,
+                 max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.embedding_model = embedding_model
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._embedder = None
+        self._collection = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _ensure_ready(self) -> bool:
+        # 首次使用时才加载嵌入模型和向量库
+        if self._collection is not None:
+            return True
+        if self._disabled:
+            return False
+        try:
+            import chromadb
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            self._disabled = True
+            return False
+        try:
+            self._embedder = SentenceTransformer(self.embedding_model)
+            client = chromadb.PersistentClient(path=self.path)
+            self._collection = client.get_or_create_collection("analyses", metadata={"hnsw:space": "cosine"})
+        except Exception as e:
+            logger.warning("语义缓存初始化失败，已禁用: %s", e)
+            self._disabled = True
+            return False
+        return True
+
+    def _embed(self, prompt: str) -> list:
+        return self._embedder.encode(prompt, normalize_embeddings=True).tolist()
+
+    @staticmethod
+    def _transcript_hash(transcript: str) -> str:
+        return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _prompt_numbers(prompt: str) -> str:
+        return ",".join(_NUMBER_PATTERN.findall(prompt))
+
+    def get(self, key: str, model: str, prompt: str, transcript: str) -> Optional[str]:
+        """查找同一字幕下语义最接近且未过期的其他提示，距离在阈值内时返回其结果
+
+        key为当前请求的精确缓存键，对应条目（在精确缓存中已被淘汰的自身）不会作为命中返回。
+        """
+        with self._lock:
+            if not self._ensure_ready():
+                return None
+            result = self._collection.query(
+                query_embeddings=[self._embed(prompt)],
+                n_results=2,
+                where={"$and": [
+                    {"transcript_hash": self._transcript_hash(transcript)},
+                    {"model": model},
+                    {"numbers": self._prompt_numbers(prompt)},
+                    {"created_at": {"$gte": int(time.time()) - self.ttl}}
+                ]}
+            )
+            if not result["ids"]:
+                return None
+            for entry_id, distance, metadata in zip(result["ids"][0], result["distances"][0], result["metadatas"][0]):
+                if entry_id != key and distance < self.max_distance:
+                    return metadata["response"]
+            return None
+
+    def set(self, key: str, model: str, prompt: str, transcript: str, response: str) -> None:
+        """记录提示的嵌入向量及其分析结果，并清理过期条目和超出容量的最旧条目"""
+        with self._lock:
+            if not self._ensure_ready():
+                return
+            now = int(time.time())
+            self._collection.upsert(
+                ids=[key],
+                embeddings=[self._embed(prompt)],
+                documents=[prompt],
+                metadatas=[{
+                    "transcript_hash": self._transcript_hash(transcript),
+                    "model": model,
+                    "numbers": self._prompt_numbers(prompt),
+                    "created_at": now,
+                    "response": response
+                }]
+            )
+            self._collection.delete(where={"created_at": {"$lt": now - self.ttl}})
+            overflow = self._collection.count() - self.max_entries
+            if overflow > 0:
+                entries = self._collection.get(include=["metadatas"])
+                oldest = sorted(zip(entries["metadatas"], entries["ids"]), key=lambda item: item[0]["created_at"])
+                self._collection.delete(ids=[entry_id for _, entry_id in oldest[:overflow]])
+
+# 复用同一个会话以保持HTTP长连接，避免每次调用LLM都重新进行TCP/TLS握手
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+_RESPONSE_CACHE = ResponseCache()
+_SEMANTIC_CACHE = SemanticCache()
+
+# 正在进行中的LLM请求，按(事件循环, 请求键)索引，相同请求到达时等待已有结果而不是重复调用
+_INFLIGHT: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+
+class _RequestAbandoned(Exception):
+    """发起请求的调用方在请求完成前被取消"""
+
+async def _coalesced(generate: Callable[..., str], model: str, text: str, prompt: str, echo: bool,
+                     template: str = TRANSCRIPT_PROMPT_TEMPLATE) -> str:
+    """在线程中执行generate(text, prompt, echo, template)，合并并发的相同请求"""
+    loop = asyncio.get_running_loop()
+    key = (loop, ResponseCache.make_key(model, prompt, text, template=template))
+    while key in _INFLIGHT:
+        try:
+            # shield避免当前调用被取消时连带取消其他调用方正在等待的请求
+            result = await asyncio.shield(_INFLIGHT[key])
+        except _RequestAbandoned:
+            # 发起请求的调用方被取消，由当前调用方重新发起
+            continue
+        # 流式输出只发生在发起请求的线程中，等待方需要时自行输出结果（与命中缓存时一致）
+        if echo:
+            sys.stdout.write(result + "\n")
+            sys.stdout.flush()
+        return result
+
+    future = loop.create_future()
+    # 没有其他调用方等待时，避免出现"Future exception was never retrieved"警告
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _INFLIGHT[key] = future
+    try:
+        result = await _run_in_thread(generate, text, prompt, echo, template)
+    except asyncio.CancelledError:
+        # 不把CancelledError传给没有被取消的等待方，让它们重新发起请求
+        future.set_exception(_RequestAbandoned())
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _INFLIGHT[key]
 
 class YouTubeExtractor:
     def __init__(self, video_url: str):
         self.video_url = video_url
         self.video_id = self.extract_video_id(video_url)
         self.transcript = None
+        self.audio_language = None  # yt-dlp报告的视频语言，用于选择转录模型
         
     def extract_video_id(self, url: str) -> str:
         """从YouTube URL中提取视频ID"""
-        patterns = [
-            r'(?:v=|/)([0-9A-Za-z_-]{11}).*',
-            r'youtu.be/([0-9A-Za-z_-]{11})',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
+        for pattern in _VIDEO_ID_PATTERNS:
+            match = pattern.search(url)
             if match:
                 return match.group(1)
         raise ValueError("无法从URL中提取视频ID")
@@ -39,179 +392,251 @@ class YouTubeExtractor:
                 })
             return languages
         except Exception as e:
-            print(f"获取字幕语言列表时出错: {str(e)}")
+            logger.error("获取字幕语言列表时出错: %s", e)
             return []
 
-    def get_transcript(self, language: Optional[str] = None) -> Tuple[str, bool]:
-        """尝试获取字幕，返回字幕内容和是否成功获取"""
+    def get_transcript(self, language: Optional[str] = None,
+                       languages: Optional[List[str]] = None) -> Tuple[str, bool]:
+        """尝试获取字幕，返回字幕内容和是否成功获取；languages按优先级给出多个候选语言"""
         try:
             if language:
                 transcript_list = YouTubeTranscriptApi.get_transcript(self.video_id, languages=[language])
+            elif languages:
+                transcript_list = YouTubeTranscriptApi.get_transcript(self.video_id, languages=languages)
             else:
                 # 尝试获取所有可用字幕中的一个
                 transcript_list = YouTubeTranscriptApi.get_transcript(self.video_id)
             
             # 将字幕列表转换为纯文本
-            full_text = ' '.join([entry['text'] for entry in transcript_list])
+            full_text = ' '.join(entry['text'] for entry in transcript_list)
             self.transcript = full_text
             return full_text, True
+        except NoTranscriptFound:
+            # 没有所请求语言的字幕，由调用方决定是否改用其他语言
+            return "", False
         except (TranscriptsDisabled, Exception) as e:
-            print(f"获取字幕时出错: {str(e)}")
+            logger.error("获取字幕时出错: %s", e)
             return "", False
 
     def download_audio_and_transcribe(self, output_dir: Optional[str] = None) -> str:
-        """下载视频的音频并使用Whisper进行转录"""
+        """下载视频的音频并使用Whisper进行转录；未指定目录时音频存放在临时目录，转录后删除"""
         try:
-            # 创建临时目录或使用指定目录
-            if output_dir is None:
-                temp_dir = tempfile.mkdtemp()
-                output_dir = temp_dir
-            else:
-                os.makedirs(output_dir, exist_ok=True)
+            logger.info("正在下载视频音频: %s", self.video_url)
+            if output_dir is not None:
+                return self.transcribe_audio(self.download_audio(output_dir))
+            with tempfile.TemporaryDirectory() as temp_dir:
+                return self.transcribe_audio(self.download_audio(temp_dir))
+        except Exception as e:
+            logger.error("下载和转录过程中出错: %s", e)
+            return f"处理失败: {str(e)}"
 
-            audio_path = os.path.join(output_dir, f"{self.video_id}.mp3")
-            
-            # 使用yt-dlp下载音频
-            print(f"正在下载视频音频: {self.video_url}")
-            
-            # 首先检查ffmpeg是否已安装
-            try:
-                subprocess.run(["ffmpeg", "-version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            except (subprocess.SubprocessError, FileNotFoundError):
-                print("错误: ffmpeg未安装。请安装ffmpeg后再试。")
-                print("在Mac上，可以使用以下命令安装: brew install ffmpeg")
-                return "无法处理音频：缺少ffmpeg。请安装后再试。"
-            
-            # 分两步下载和转换，避免一步出错
-            download_command = [
-                "yt-dlp",
-                "-f", "bestaudio",
-                "-o", f"{output_dir}/{self.video_id}.%(ext)s",
-                self.video_url
-            ]
-            
-            try:
-                print("第1步：下载音频...")
-                subprocess.run(download_command, check=True)
-                
-                # 找到下载的音频文件
-                files = os.listdir(output_dir)
-                audio_files = [f for f in files if f.startswith(self.video_id) and f != f"{self.video_id}.mp3"]
-                
-                if not audio_files:
-                    raise FileNotFoundError("下载文件未找到")
-                    
-                downloaded_file = os.path.join(output_dir, audio_files[0])
-                
-                # 转换为mp3
-                print("第2步：转换为MP3格式...")
-                convert_command = [
-                    "ffmpeg", 
-                    "-i", downloaded_file,
-                    "-q:a", "0",
-                    "-map", "a",
-                    audio_path,
-                    "-y"
-                ]
-                subprocess.run(convert_command, check=True)
-                
-                # 删除原始下载文件
-                os.remove(downloaded_file)
-                
-            except subprocess.CalledProcessError as e:
-                print(f"命令执行失败: {e}")
-                # 尝试直接下载为mp3
-                fallback_command = [
-                    "yt-dlp",
-                    "--extract-audio",
-                    "--audio-format", "mp3",
-                    "--audio-quality", "0",
-                    "-o", audio_path,
-                    self.video_url
-                ]
-                print("尝试备用下载方法...")
-                subprocess.run(fallback_command, check=True)
-
-            if not os.path.exists(audio_path):
-                raise FileNotFoundError(f"下载失败，无法找到文件: {audio_path}")
-            
-            # 使用Whisper进行转录
-            print("正在使用Whisper转录音频...")
-            transcript_path = os.path.join(output_dir, f"{self.video_id}.txt")
-            
-            # 使用Whisper命令行工具
-            whisper_command = [
-                "whisper", 
-                audio_path, 
-                "--model", "medium",  # 使用medium模型提高精度
-                "--language", "auto",  # 自动检测语言
-                "--output_dir", output_dir,
-                "--output_format", "txt"
-            ]
-            
+    def download_audio(self, output_dir: str) -> str:
+        """下载视频的原始音频流（不转码）到output_dir，返回音频文件路径"""
+        os.makedirs(output_dir, exist_ok=True)
+        audio_path, self.audio_language = _yt_dlp_download(self.video_url, self._audio_outtmpl(output_dir))
+        return _check_downloaded(audio_path)
+
+    async def download_audio_async(self, output_dir: str) -> str:
+        """在子进程中用yt-dlp下载原始音频流（不转码），返回音频文件路径；任务被取消时终止子进程"""
+        os.makedirs(output_dir, exist_ok=True)
+
+        # extract_info无法从外部中断，放到可以直接终止的子进程中运行
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=_yt_dlp_download_worker,
+            args=(self.video_url, self._audio_outtmpl(output_dir), sender),
+            daemon=True
+        )
+        process.start()
+        sender.close()
+        try:
+            status, payload = await _run_in_thread(receiver.recv)
+        except asyncio.CancelledError:
+            _kill_process_tree(process.pid)
+            process.kill()
+            raise
+        except EOFError:
+            # 子进程未发回结果就退出（如被系统终止）
+            process.join()
+            raise RuntimeError(f"下载进程意外退出（退出码: {process.exitcode}）") from None
+        finally:
+            process.join()
+        if status != "ok":
+            raise RuntimeError(f"yt-dlp下载失败: {payload}")
+
+        audio_path, self.audio_language = payload
+        return _check_downloaded(audio_path)
+
+    def _audio_outtmpl(self, output_dir: str) -> str:
+        return os.path.join(output_dir, f"{self.video_id}.%(ext)s")
+
+    def transcribe_audio(self, audio_path: str, language: Optional[str] = None) -> str:
+        """使用Whisper转录音频文件（模型在进程内只加载一次），已知为英文时使用蒸馏模型"""
+        language = language or self.audio_language
+        if language and language.startswith("en"):
+            model_name, language = WHISPER_ENGLISH_MODEL, "en"
+        else:
+            model_name = WHISPER_MULTILINGUAL_MODEL
+            if language:
+                # Whisper只接受zh、ja等基础语言代码，去掉zh-Hans等代码中的地区和文字部分
+                language = language.split("-")[0].lower()
+            # 语言未知时由多语言模型自动检测
+        logger.info("正在使用Whisper转录音频（%s）...", model_name)
+        try:
+            model = _get_whisper_model(model_name)
+            # VAD过滤跳过静音片段，减少解码步数
+            segments, _ = model.transcribe(audio_path, language=language, vad_filter=True, beam_size=1)
+            transcript_text = " ".join(segment.text.strip() for segment in segments)
+        except Exception as e:
+            logger.error("Whisper转录失败: %s", e)
+            return "音频转录失败。"
+
+        self.transcript = transcript_text
+        return transcript_text
+
+    def _get_cached_analysis(self, model: str, prompt: str, text: str, temperature: Optional[float] = None,
+                             template: str = TRANSCRIPT_PROMPT_TEMPLATE) -> Tuple[str, Optional[str]]:
+        """先精确查找再语义查找缓存的分析结果，返回(缓存键, 缓存结果)"""
+        cache_key = ResponseCache.make_key(model, prompt, text, temperature, template)
+        cached, expired = None, False
+        try:
+            cached, expired = _RESPONSE_CACHE.lookup(cache_key)
+        except Exception as e:
+            logger.warning("响应缓存查询失败: %s", e)
+        # 精确缓存中已过期的请求需要重新生成，不用语义缓存顶替
+        if cached is None and not expired:
             try:
-                subprocess.run(whisper_command, check=True)
-            except (subprocess.SubprocessError, FileNotFoundError) as e:
-                print(f"Whisper转录失败: {e}")
-                # 如果whisper命令行失败，尝试使用Python API
-                print("尝试使用Whisper Python API...")
-                try:
-                    import whisper
-                    model = whisper.load_model("medium")
-                    result = model.transcribe(audio_path)
-                    transcript_text = result["text"]
-                    
-                    # 手动保存结果
-                    with open(transcript_path, 'w', encoding='utf-8') as f:
-                        f.write(transcript_text)
-                except Exception as e2:
-                    print(f"Whisper Python API也失败了: {e2}")
-                    return "音频转录失败。"
-                
-            # 读取转录文本
-            if os.path.exists(transcript_path):
-                with open(transcript_path, 'r', encoding='utf-8') as f:
-                    transcript_text = f.read()
-                
-                self.transcript = transcript_text
-                return transcript_text
-            else:
-                return "转录完成，但找不到输出文件。"
-                
+                cached = _SEMANTIC_CACHE.get(cache_key, model, prompt, text)
+            except Exception as e:
+                logger.warning("语义缓存查询失败: %s", e)
+        return cache_key, cached
+
+    def _save_analysis(self, cache_key: str, model: str, prompt: str, text: str, result: str) -> None:
+        """将分析结果写入精确缓存和语义缓存"""
+        try:
+            _RESPONSE_CACHE.set(cache_key, result, model)
         except Exception as e:
-            print(f"下载和转录过程中出错: {str(e)}")
-            return f"处理失败: {str(e)}"
+            logger.warning("写入响应缓存失败: %s", e)
+        try:
+            _SEMANTIC_CACHE.set(cache_key, model, prompt, text, result)
+        except Exception as e:
+            logger.warning("写入语义缓存失败: %s", e)
+
+    def _transcript_chunks(self) -> List[str]:
+        """字幕较长时按TRANSCRIPT_CHUNK_CHARS分段，否则整体作为一段"""
+        if len(self.transcript) <= TRANSCRIPT_CHUNK_CHARS:
+            return [self.transcript]
+        return textwrap.wrap(self.transcript, TRANSCRIPT_CHUNK_CHARS)
+
+    def _map_reduce_sync(self, generate: Callable[..., str], prompt: str, echo: bool) -> str:
+        """字幕较长时依次分析各段，再综合各段结果；不依赖事件循环，可在Jupyter等已有事件循环的环境中调用"""
+        chunks = self._transcript_chunks()
+        if len(chunks) == 1:
+            return generate(chunks[0], prompt, echo)
+
+        logger.info("字幕较长，分为%s段依次分析...", len(chunks))
+        partials = [generate(chunk, prompt, False) for chunk in chunks]
+        return generate("\n\n".join(partials), prompt, echo, REDUCE_PROMPT_TEMPLATE)
+
+    async def _map_reduce(self, generate: Callable[..., str], model: str,
+                          prompt: str, echo: bool) -> str:
+        """字幕较长时分段并行分析，再综合各段结果；generate(text, prompt, echo, template)在线程中执行"""
+        chunks = self._transcript_chunks()
+        if len(chunks) == 1:
+            return await _coalesced(generate, model, chunks[0], prompt, echo)
+
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_CHUNKS)
+
+        async def analyze_chunk(chunk: str) -> str:
+            async with semaphore:
+                return await _coalesced(generate, model, chunk, prompt, False)
+
+        logger.info("字幕较长，分为%s段并行分析...", len(chunks))
+        partials = await asyncio.gather(*[analyze_chunk(chunk) for chunk in chunks])
+        return await _coalesced(generate, model, "\n\n".join(partials), prompt, echo, REDUCE_PROMPT_TEMPLATE)
+
+    def _generate_with_local_llm(self, text: str, prompt: str, echo: bool,
+                                 template: str = TRANSCRIPT_PROMPT_TEMPLATE) -> str:
+        """调用ollama分析一段文本，失败时抛出异常"""
+        model = LOCAL_LLM_MODEL
+        cache_key, cached = self._get_cached_analysis(model, prompt, text, template=template)
+        if cached is not None:
+            # 命中缓存时同样输出，与未命中时的流式输出保持一致
+            if echo:
+                sys.stdout.write(cached + "\n")
+                sys.stdout.flush()
+            return cached
+
+        # 使用ollama API（假设在本地运行）
+        with _SESSION.post(
+            "http://localhost:11434/api/generate",
+            json={
+                "model": model,
+                "prompt": template.format(text=text, prompt=prompt),
+                "stream": True
+            },
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"分析失败: {response.status_code} - {response.text}")
+
+            # 逐行读取生成结果，边生成边输出
+            parts = []
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise Exception(f"分析失败: {chunk['error']}")
+                token = chunk.get("response", "")
+                parts.append(token)
+                if echo:
+                    sys.stdout.write(token)
+                    sys.stdout.flush()
+                if chunk.get("done"):
+                    break
+        if echo:
+            sys.stdout.write("\n")
 
-    def analyze_with_local_llm(self, prompt: str) -> str:
-        """使用本地LLM分析字幕内容（示例使用ollama）"""
+        result = "".join(parts)
+        self._save_analysis(cache_key, model, prompt, text, result)
+        return result
+
+    def analyze_with_local_llm(self, prompt: str, echo: bool = True) -> str:
+        """使用本地LLM分析字幕内容（示例使用ollama），echo为True时流式输出生成内容"""
         if not self.transcript:
             raise ValueError("请先获取字幕内容")
-        
+
         try:
-            # 使用ollama API（假设在本地运行）
-            response = requests.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "llama3",  # 或其他已下载的模型
-                    "prompt": f"以下是YouTube视频的字幕内容：\n\n{self.transcript}\n\n{prompt}",
-                    "stream": False
-                }
-            )
-            
-            if response.status_code == 200:
-                return response.json()["response"]
-            else:
-                return f"分析失败: {response.status_code} - {response.text}"
-        
+            return self._map_reduce_sync(self._generate_with_local_llm, prompt, echo)
         except Exception as e:
-            print(f"使用本地LLM分析时出错: {str(e)}")
+            logger.error("使用本地LLM分析时出错: %s", e)
             return f"分析过程中出错: {str(e)}"
 
-    def analyze_with_claude_basic(self, api_key: str, prompt: str) -> str:
-        """使用Claude API分析字幕内容，使用最经济的方式"""
+    async def analyze_with_local_llm_async(self, prompt: str, echo: bool = True) -> str:
+        """analyze_with_local_llm的异步版本，长字幕分段并行分析"""
         if not self.transcript:
             raise ValueError("请先获取字幕内容")
 
+        try:
+            return await self._map_reduce(self._generate_with_local_llm, LOCAL_LLM_MODEL, prompt, echo)
+        except Exception as e:
+            logger.error("使用本地LLM分析时出错: %s", e)
+            return f"分析过程中出错: {str(e)}"
+
+    def _generate_with_claude(self, api_key: str, text: str, prompt: str, echo: bool,
+                              template: str = TRANSCRIPT_PROMPT_TEMPLATE) -> str:
+        """调用Claude API分析一段文本，失败时抛出异常"""
+        model = CLAUDE_MODEL
+        temperature = 0.3  # 较低的温度以获得更确定的回答
+        cache_key, cached = self._get_cached_analysis(model, prompt, text, temperature, template)
+        if cached is not None:
+            # 命中缓存时同样输出，与未命中时的流式输出保持一致
+            if echo:
+                sys.stdout.write(cached + "\n")
+                sys.stdout.flush()
+            return cached
+
         headers = {
             "x-api-key": api_key,
             "Content-Type": "application/json",
@@ -220,63 +645,202 @@ class YouTubeExtractor:
 
         # 使用更小、更经济的模型
         data = {
-            "model": "claude-3-haiku-20240307",  # 使用Haiku模型降低成本
+            "model": model,
             "messages": [
                 {
                     "role": "user",
-                    "content": f"以下是YouTube视频的字幕内容：\n\n{self.transcript}\n\n{prompt}"
+                    "content": template.format(text=text, prompt=prompt)
                 }
             ],
             "max_tokens": 500,  # 限制输出令牌数以控制成本
-            "temperature": 0.3  # 较低的温度以获得更确定的回答
+            "temperature": temperature,
+            "stream": True
         }
 
-        response = requests.post(
+        with _SESSION.post(
             "https://api.anthropic.com/v1/messages",
             headers=headers,
-            json=data
-        )
+            json=data,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"API调用失败: {response.status_code} - {response.text}")
 
-        if response.status_code == 200:
-            return response.json()['content'][0]['text']
-        else:
-            raise Exception(f"API调用失败: {response.status_code} - {response.text}")
+            # 解析SSE事件流，只取文本增量
+            parts = []
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                if event["type"] == "error":
+                    raise Exception(f"API调用失败: {event['error']}")
+                if event["type"] == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                    token = event["delta"]["text"]
+                    parts.append(token)
+                    if echo:
+                        sys.stdout.write(token)
+                        sys.stdout.flush()
+                elif event["type"] == "message_stop":
+                    break
+        if echo:
+            sys.stdout.write("\n")
 
-def process_youtube_video(video_url: str, analysis_prompt: str = "总结这个视频的主要内容") -> Dict[str, Any]:
-    """处理YouTube视频的完整流程，优先使用字幕，失败则下载并转录"""
-    extractor = YouTubeExtractor(video_url)
-    
-    # 步骤1: 尝试获取现有字幕
-    print("步骤1: 尝试获取现有字幕...")
-    available_languages = extractor.get_available_transcript_languages()
-    
+        result = "".join(parts)
+        self._save_analysis(cache_key, model, prompt, text, result)
+        return result
+
+    def analyze_with_claude_basic(self, api_key: str, prompt: str, echo: bool = True) -> str:
+        """使用Claude API分析字幕内容，使用最经济的方式，echo为True时流式输出生成内容"""
+        if not self.transcript:
+            raise ValueError("请先获取字幕内容")
+
+        generate = functools.partial(self._generate_with_claude, api_key)
+        return self._map_reduce_sync(generate, prompt, echo)
+
+    async def analyze_with_claude_basic_async(self, api_key: str, prompt: str, echo: bool = True) -> str:
+        """analyze_with_claude_basic的异步版本，长字幕分段并行分析"""
+        if not self.transcript:
+            raise ValueError("请先获取字幕内容")
+
+        generate = functools.partial(self._generate_with_claude, api_key)
+        return await self._map_reduce(generate, CLAUDE_MODEL, prompt, echo)
+
+async def _get_existing_subtitles(extractor: YouTubeExtractor,
+                                  languages_task: "asyncio.Future[list]") -> Tuple[str, bool]:
+    """获取现有字幕，返回(字幕内容, 是否成功)
+
+    先直接按常用语言请求字幕，省去查询语言列表的一次往返；都没有时再从语言列表中选择，优先中文。
+    """
+    transcript, success = await _run_in_thread(extractor.get_transcript, languages=PREFERRED_SUBTITLE_LANGUAGES)
+    if success and transcript:
+        return transcript, True
+
+    available_languages = await languages_task
     if available_languages:
         # 优先尝试中文字幕
         chinese_subs = [lang for lang in available_languages if lang['language_code'].startswith('zh')]
         if chinese_subs:
-            transcript, success = extractor.get_transcript(language=chinese_subs[0]['language_code'])
+            language = chinese_subs[0]['language_code']
         else:
             # 否则使用第一个可用字幕
-            transcript, success = extractor.get_transcript(language=available_languages[0]['language_code'])
-    else:
-        transcript, success = "", False
-    
-    # 步骤2: 如果字幕获取失败，则下载并转录
-    if not success or not transcript:
-        print("步骤2: 字幕获取失败，尝试下载并转录...")
-        transcript = extractor.download_audio_and_transcribe()
-    
-    # 步骤3: 分析内容
+            language = available_languages[0]['language_code']
+        return await _run_in_thread(extractor.get_transcript, language=language)
+    return "", False
+
+async def _analyze_transcript(extractor: YouTubeExtractor, transcript: str, analysis_prompt: str,
+                              echo: bool = True) -> str:
+    """分析字幕内容，优先使用本地LLM，失败时返回提示信息"""
     analysis_result = "未进行分析"
     if transcript:
-        print("步骤3: 分析内容...")
+        logger.info("步骤3: 分析内容...")
         try:
             # 优先使用本地LLM（如果可用）
-            analysis_result = extractor.analyze_with_local_llm(analysis_prompt)
+            analysis_result = await extractor.analyze_with_local_llm_async(analysis_prompt, echo)
         except Exception as e:
-            print(f"本地分析失败，错误: {str(e)}")
-            print("如果需要使用Claude API，请提供API密钥")
-    
+            logger.warning("本地分析失败，错误: %s", e)
+            logger.warning("如果需要使用Claude API，请提供API密钥")
+    return analysis_result
+
+def write_text_atomic(path: Path, text: str, compress: bool = False) -> Path:
+    """先写入临时文件再替换，避免中途出错留下不完整的文件，返回实际写入的路径
+
+    compress为True时以zstd压缩，文件名追加.zst后缀；未安装zstandard时抛出RuntimeError。
+    """
+    data = text.encode("utf-8")
+    if compress:
+        if zstandard is None:
+            raise RuntimeError("压缩保存需要安装zstandard（pip install zstandard），或将COMPRESS_TRANSCRIPTS设为False")
+        data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        path = path.with_name(path.name + ".zst")
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return path
+
+def read_text(path: Path) -> str:
+    """读取write_text_atomic写入的文本，.zst文件自动解压"""
+    data = path.read_bytes()
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"读取{path}需要安装zstandard")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return data.decode("utf-8")
+
+def _load_video_cache(video_id: str) -> Optional[Dict[str, Any]]:
+    """读取未过期的字幕缓存，返回{"languages": ..., "transcript": ...}，没有则返回None"""
+    cache_path = Path(CACHE_DIR) / f"{video_id}.json"
+    # 优先读取当前设置对应的格式，也兼容切换COMPRESS_TRANSCRIPTS之前写入的缓存
+    candidates = [cache_path, cache_path.with_name(cache_path.name + ".zst")]
+    if COMPRESS_TRANSCRIPTS:
+        candidates.reverse()
+    for path in candidates:
+        try:
+            if time.time() - path.stat().st_mtime >= VIDEO_CACHE_TTL:
+                continue
+            return json.loads(read_text(path))
+        except Exception:
+            # 文件不存在或内容损坏时视为未命中
+            continue
+    return None
+
+def _save_video_cache(extractor: YouTubeExtractor, available_languages: list) -> None:
+    """成功获取字幕或转录后写入缓存，供重复运行时直接使用"""
+    if not extractor.transcript:
+        return
+    cache_path = Path(CACHE_DIR) / f"{extractor.video_id}.json"
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        write_text_atomic(cache_path, json.dumps({
+            "languages": available_languages,
+            "transcript": extractor.transcript
+        }, ensure_ascii=False), compress=COMPRESS_TRANSCRIPTS)
+    except (OSError, RuntimeError) as e:
+        logger.warning("写入字幕缓存失败: %s", e)
+
+def _use_cached_transcript(extractor: YouTubeExtractor) -> Optional["asyncio.Future[list]"]:
+    """命中字幕缓存时写入extractor.transcript，返回已完成的语言列表Future；未命中返回None"""
+    cached = _load_video_cache(extractor.video_id)
+    if cached is None:
+        return None
+    logger.info("使用已缓存的字幕...")
+    extractor.transcript = cached["transcript"]
+    languages_future = asyncio.get_running_loop().create_future()
+    languages_future.set_result(cached["languages"])
+    return languages_future
+
+async def _get_subtitles_or_audio(extractor: YouTubeExtractor, languages_task: "asyncio.Future[list]",
+                                  audio_dir: str) -> Tuple[str, Optional[str]]:
+    """获取现有字幕，同时预先把音频下载到audio_dir以备字幕不可用
+
+    返回(字幕内容, 音频路径)：字幕可用时取消下载，音频路径为None；否则返回下载好的音频路径，
+    下载失败时返回错误信息和None。
+    """
+    download_task = asyncio.create_task(extractor.download_audio_async(audio_dir))
+    transcript, success = await _get_existing_subtitles(extractor, languages_task)
+    if success and transcript:
+        # 字幕可用，取消音频下载
+        download_task.cancel()
+        await asyncio.gather(download_task, return_exceptions=True)
+        return transcript, None
+
+    logger.info("字幕获取失败，正在下载视频音频: %s", extractor.video_url)
+    try:
+        return "", await download_task
+    except Exception as e:
+        logger.error("下载音频时出错: %s", e)
+        return f"处理失败: {str(e)}", None
+
+def _cache_when_languages_ready(extractor: YouTubeExtractor,
+                                languages_task: "asyncio.Future[list]") -> "asyncio.Task[list]":
+    """在后台等待语言列表查询完成后写入字幕缓存，返回得到语言列表的任务"""
+    async def save() -> list:
+        available_languages = await languages_task
+        _save_video_cache(extractor, available_languages)
+        return available_languages
+    return asyncio.create_task(save())
+
+def _build_result(extractor: YouTubeExtractor, available_languages: list, transcript: str,
+                  analysis_result: str) -> Dict[str, Any]:
     return {
         "video_id": extractor.video_id,
         "available_languages": available_languages,
@@ -284,16 +848,104 @@ def process_youtube_video(video_url: str, analysis_prompt: str = "总结这个
         "analysis": analysis_result
     }
 
+async def _acquire_transcript(extractor: YouTubeExtractor) -> Tuple["asyncio.Future[list]", str]:
+    """获取字幕内容，优先使用缓存和现有字幕，失败则下载并转录
+
+    返回(可用语言列表的Future, 字幕内容)。语言列表只用于展示，在后台查询，不阻塞后续分析。
+    """
+    languages_future = _use_cached_transcript(extractor)
+    if languages_future is not None:
+        return languages_future, extractor.transcript
+
+    # 步骤1: 尝试获取现有字幕，同时预先下载音频以备字幕不可用
+    logger.info("步骤1: 尝试获取现有字幕...")
+    languages_task = asyncio.create_task(_run_in_thread(extractor.get_available_transcript_languages))
+    # 音频只在本函数内使用，下载取消或转录完成后连同目录一起删除
+    with tempfile.TemporaryDirectory() as audio_dir:
+        transcript, audio_path = await _get_subtitles_or_audio(extractor, languages_task, audio_dir)
+        if audio_path:
+            # 步骤2: 字幕获取失败，转录预先下载的音频
+            logger.info("步骤2: 转录音频...")
+            transcript = await _run_in_thread(extractor.transcribe_audio, audio_path)
+
+    return _cache_when_languages_ready(extractor, languages_task), transcript
+
+async def process_youtube_video(video_url: str, analysis_prompt: str = "总结这个视频的主要内容",
+                                echo: bool = True) -> Dict[str, Any]:
+    """处理YouTube视频的完整流程，优先使用字幕，失败则下载并转录；echo为True时实时输出分析结果"""
+    extractor = YouTubeExtractor(video_url)
+    languages_future, transcript = await _acquire_transcript(extractor)
+    
+    # 步骤3: 分析内容
+    analysis_result = await _analyze_transcript(extractor, transcript, analysis_prompt, echo)
+    return _build_result(extractor, await languages_future, transcript, analysis_result)
+
+async def process_batch(video_urls: List[str], analysis_prompt: str = "总结这个视频的主要内容") -> List[Dict[str, Any]]:
+    """批量处理多个视频，按输入顺序返回结果
+
+    下载、转录、分析三个阶段通过队列组成流水线，下一个视频的下载与当前视频的转录重叠进行；
+    所有视频共享同一个Whisper模型，只加载一次。
+    """
+    extractors = [YouTubeExtractor(url) for url in video_urls]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(extractors)
+    # 限制已下载但未转录的音频数量，避免下载远远领先于转录
+    transcribe_queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+    analyze_queue: asyncio.Queue = asyncio.Queue()
+
+    async def download_worker() -> None:
+        for index, extractor in enumerate(extractors):
+            logger.info("[%s/%s] 获取字幕: %s", index + 1, len(extractors), extractor.video_url)
+            languages_future = _use_cached_transcript(extractor)
+            if languages_future is not None:
+                await transcribe_queue.put((index, extractor, languages_future, extractor.transcript, None, None))
+                continue
+            languages_future = asyncio.create_task(_run_in_thread(extractor.get_available_transcript_languages))
+            # 临时目录在转录阶段用完后删除
+            audio_dir = tempfile.TemporaryDirectory()
+            transcript, audio_path = await _get_subtitles_or_audio(extractor, languages_future, audio_dir.name)
+            if not audio_path:
+                audio_dir.cleanup()
+                audio_dir = None
+                languages_future = _cache_when_languages_ready(extractor, languages_future)
+            await transcribe_queue.put((index, extractor, languages_future, transcript, audio_dir, audio_path))
+        await transcribe_queue.put(None)
+
+    async def transcribe_worker() -> None:
+        while (item := await transcribe_queue.get()) is not None:
+            index, extractor, languages_future, transcript, audio_dir, audio_path = item
+            if audio_path:
+                try:
+                    transcript = await _run_in_thread(extractor.transcribe_audio, audio_path)
+                finally:
+                    audio_dir.cleanup()
+                languages_future = _cache_when_languages_ready(extractor, languages_future)
+            await analyze_queue.put((index, extractor, languages_future, transcript))
+        await analyze_queue.put(None)
+
+    async def analyze_worker() -> None:
+        while (item := await analyze_queue.get()) is not None:
+            index, extractor, languages_future, transcript = item
+            # 批量模式下不流式输出，避免与其他阶段的日志交错
+            analysis_result = await _analyze_transcript(extractor, transcript, analysis_prompt, echo=False)
+            results[index] = _build_result(extractor, await languages_future, transcript, analysis_result)
+
+    await asyncio.gather(download_worker(), transcribe_worker(), analyze_worker())
+    return results
+
 # 使用示例
 if __name__ == "__main__":
+    # 默认只输出警告和错误，加-v参数显示处理进度
+    logging.basicConfig(format="%(message)s")
+    if "-v" in sys.argv:
+        logger.setLevel(logging.INFO)
     video_url = "https://www.youtube.com/watch?v=3MjS9w60MMw"
-    result = process_youtube_video(
+    result = asyncio.run(process_youtube_video(
         video_url, 
         "请列出这个视频中提到的华人移民需要注意的7件事。"
-    )
+    ))
     
     print("\n=== 处理结果 ===")
     print(f"视频ID: {result['video_id']}")
     print(f"可用字幕语言: {result['available_languages']}")
     print(f"字幕内容预览: {result['transcript'][:200]}...")
-    print(f"分析结果: {result['analysis']}")
\ No newline at end of file
+    # 分析结果已在处理过程中实时输出，这里不再重复打印
\ No newline at end of file